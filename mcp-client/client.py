@@ -1,25 +1,47 @@
+import argparse
 import asyncio
+import itertools
+from dataclasses import dataclass, field
 from typing import Optional
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, suppress
 import ollama
-import uuid
-import json
+# the host resolution ollama.AsyncClient applies to OLLAMA_HOST
+from ollama._client import _parse_host
+import cachetools
+import httpx
+import orjson
 import logging
 import logging.config
+import os
+import re
 import sys
+import time
 
-from rich import print
+from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
-from rich.prompt import Prompt
 
 
 from mcp import ClientSession, StdioServerParameters
+from mcp.types import CallToolResult
 from mcp.client.stdio import stdio_client
 
 from anthropic import Anthropic
 from dotenv import load_dotenv
 
+try:
+    from aioconsole import ainput
+except ImportError:
+    async def ainput(prompt: str = "") -> str:
+        return await asyncio.to_thread(input, prompt)
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # semantic cache is optional
+    SentenceTransformer = None
+
 load_dotenv()  # load environment variables from .env
 # Configure logging
 logging.config.dictConfig({
@@ -31,14 +53,235 @@ logging.basicConfig(
   format="%(asctime)s - %(levelname)s - %(message)s",
   stream=sys.stderr,
 )
+logger = logging.getLogger(__name__)
+
+# how long tool results (NWS responses) are reused
+TOOL_CACHE_TTL = 300
+# queries whose embeddings are at least this similar share a cached response
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 512
+# a cached answer never outlives the tool results it summarizes
+SEMANTIC_CACHE_TTL = TOOL_CACHE_TTL
+# how long Ollama keeps the model loaded after each request
+KEEP_ALIVE = "1h"
+# kept byte-identical at messages[0] of every tool-selection request so the
+# model server can reuse the KV cache for the prompt prefix
+SYSTEM_PROMPT_STATIC = "You are a helpful assistant. Use the available tools to answer the user's question."
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT_STATIC}
+# fixed, minimal prompt for summarizing tool output so the prefix stays cacheable
+SUMMARY_SYS = {"role": "system", "content": "Summarize the tool result for the user."}
+SUMMARY_NUM_CTX = 1024
+# bounded KV cache and deterministic output for the tool-selection call
+TOOL_SELECT_OPTS = {"num_ctx": 1024, "num_predict": 256, "temperature": 0, "top_p": 1.0}
+
+# bordering states, most likely follow-ups first, used to prefetch weather alerts
+STATE_NEIGHBORS = {
+    "AL": ("FL", "GA", "TN", "MS"),
+    "AZ": ("CA", "NV", "NM", "UT", "CO"),
+    "AR": ("TX", "TN", "MO", "LA", "MS", "OK"),
+    "CA": ("NV", "OR", "AZ"),
+    "CO": ("UT", "NM", "WY", "KS", "NE", "OK", "AZ"),
+    "CT": ("NY", "MA", "RI"),
+    "DE": ("PA", "MD", "NJ"),
+    "FL": ("GA", "AL"),
+    "GA": ("FL", "SC", "NC", "TN", "AL"),
+    "ID": ("WA", "OR", "MT", "UT", "NV", "WY"),
+    "IL": ("IN", "WI", "MO", "IA", "KY"),
+    "IN": ("IL", "OH", "MI", "KY"),
+    "IA": ("IL", "MN", "WI", "MO", "NE", "SD"),
+    "KS": ("MO", "CO", "NE", "OK"),
+    "KY": ("OH", "TN", "IN", "IL", "WV", "VA", "MO"),
+    "LA": ("TX", "MS", "AR"),
+    "ME": ("NH",),
+    "MD": ("VA", "PA", "DE", "WV"),
+    "MA": ("NY", "CT", "RI", "NH", "VT"),
+    "MI": ("OH", "IN", "WI"),
+    "MN": ("WI", "IA", "ND", "SD"),
+    "MS": ("AL", "LA", "TN", "AR"),
+    "MO": ("IL", "KS", "AR", "TN", "KY", "IA", "NE", "OK"),
+    "MT": ("ID", "WY", "ND", "SD"),
+    "NE": ("IA", "KS", "CO", "MO", "SD", "WY"),
+    "NV": ("CA", "AZ", "UT", "OR", "ID"),
+    "NH": ("MA", "VT", "ME"),
+    "NJ": ("NY", "PA", "DE"),
+    "NM": ("TX", "AZ", "CO", "OK", "UT"),
+    "NY": ("NJ", "PA", "CT", "MA", "VT"),
+    "NC": ("VA", "SC", "GA", "TN"),
+    "ND": ("MN", "SD", "MT"),
+    "OH": ("PA", "MI", "IN", "KY", "WV"),
+    "OK": ("TX", "KS", "AR", "MO", "CO", "NM"),
+    "OR": ("WA", "CA", "ID", "NV"),
+    "PA": ("NY", "NJ", "OH", "MD", "DE", "WV"),
+    "RI": ("MA", "CT"),
+    "SC": ("NC", "GA"),
+    "SD": ("MN", "IA", "NE", "ND", "MT", "WY"),
+    "TN": ("GA", "NC", "KY", "VA", "AL", "MS", "AR", "MO"),
+    "TX": ("OK", "LA", "NM", "AR"),
+    "UT": ("AZ", "CO", "NV", "ID", "WY", "NM"),
+    "VT": ("NY", "NH", "MA"),
+    "VA": ("NC", "MD", "WV", "KY", "TN"),
+    "WA": ("OR", "ID"),
+    "WV": ("PA", "VA", "OH", "MD", "KY"),
+    "WI": ("IL", "MN", "MI", "IA"),
+    "WY": ("CO", "MT", "UT", "ID", "NE", "SD"),
+}
+PREFETCH_NEIGHBORS = 2
+
+# state names, and other names that refer to a state, by two-letter code
+PLACE_CODES = {
+    "alabama": "AL",
+    "alaska": "AK",
+    "arizona": "AZ",
+    "arkansas": "AR",
+    "california": "CA",
+    "colorado": "CO",
+    "connecticut": "CT",
+    "delaware": "DE",
+    "florida": "FL",
+    "georgia": "GA",
+    "hawaii": "HI",
+    "idaho": "ID",
+    "illinois": "IL",
+    "indiana": "IN",
+    "iowa": "IA",
+    "kansas": "KS",
+    "kentucky": "KY",
+    "louisiana": "LA",
+    "maine": "ME",
+    "maryland": "MD",
+    "massachusetts": "MA",
+    "michigan": "MI",
+    "minnesota": "MN",
+    "mississippi": "MS",
+    "missouri": "MO",
+    "montana": "MT",
+    "nebraska": "NE",
+    "nevada": "NV",
+    "new hampshire": "NH",
+    "new jersey": "NJ",
+    "new mexico": "NM",
+    "new york": "NY",
+    "north carolina": "NC",
+    "north dakota": "ND",
+    "ohio": "OH",
+    "oklahoma": "OK",
+    "oregon": "OR",
+    "pennsylvania": "PA",
+    "rhode island": "RI",
+    "south carolina": "SC",
+    "south dakota": "SD",
+    "tennessee": "TN",
+    "texas": "TX",
+    "utah": "UT",
+    "vermont": "VT",
+    "virginia": "VA",
+    "washington": "WA",
+    "west virginia": "WV",
+    "wisconsin": "WI",
+    "wyoming": "WY",
+    "district of columbia": "DC",
+    "washington dc": "DC",
+    "new york city": "NY",
+    "nyc": "NY",
+}
+STATE_CODES = frozenset(PLACE_CODES.values())
+# codes that are also everyday words ("in", "or", "me"), recognized only in upper case
+AMBIGUOUS_CODES = frozenset({"AL", "CO", "DE", "HI", "ID", "IN", "LA", "MA", "ME", "OH", "OK", "OR", "PA"})
+# longest names first so "new york city" wins over "new york"
+LOCATION_RE = re.compile(
+    r"\b(?i:(" + "|".join(sorted(map(re.escape, PLACE_CODES), key=len, reverse=True)) + r"))\b"
+    r"|\b([A-Za-z]{2})\b"
+    r"|(-?\d+\.\d+)"
+)
+
+console = Console()
+# parsed once at import instead of on every exit
+EXIT_PANEL = Panel(Markdown("Exiting chate mode."), style="bold red")
+
+
+@dataclass
+class QueryResult:
+    """Outcome of a single query, kept per call so concurrent queries don't mix"""
+    text: str
+    # (tool name, args) of every tool the model called
+    tool_calls: list[tuple[str, dict]] = field(default_factory=list)
+    # whether the text was already rendered while streaming
+    streamed: bool = False
+    # whether the text is a successful tool-backed answer worth caching
+    cacheable: bool = False
+
+
+def query_locations(query: str) -> frozenset[str]:
+    """States (as two-letter codes) and coordinates mentioned in a query
+
+    A semantic cache hit requires these to match exactly, since embeddings
+    alone can't reliably tell "alerts for CA" from "alerts for TX".
+    """
+    locations = set()
+    for match in LOCATION_RE.finditer(query):
+        name, code, number = match.groups()
+        if name:
+            locations.add(PLACE_CODES[name.lower()])
+        elif code:
+            code_upper = code.upper()
+            if code_upper in STATE_CODES and (code.isupper() or code_upper not in AMBIGUOUS_CODES):
+                locations.add(code_upper)
+        else:
+            # ~1 km, finer than the NWS forecast grid
+            locations.add(f"{float(number):.2f}")
+    return frozenset(locations)
+
+
+def normalize_tool_args(tool_name: str, tool_args: dict) -> dict:
+    """Canonicalize arguments the server treats as equivalent so they share tool-cache entries"""
+    # the weather server upper-cases the state itself
+    if tool_name == "get-alerts" and isinstance(tool_args.get("state"), str):
+        return {**tool_args, "state": tool_args["state"].upper()}
+    return tool_args
+
+
+def print_markdown(text: str, **panel_kwargs):
+    """Render text as Markdown inside a Panel; run via asyncio.to_thread to keep parsing off the event loop"""
+    console.print(Panel(Markdown(text), **panel_kwargs))
 
 class MCPClient:
     def __init__(self):
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
+        # OpenAI-format tool schema, serialized once; bytes so it can't be mutated
+        self._tools_json: bytes = b""
+        # tool-call ids only need to be unique within this client
+        self._tool_id = itertools.count()
+        # follow-up prefetch started after the last query
+        self._prefetch_task: Optional[asyncio.Task] = None
         self.exit_stack = AsyncExitStack()
         self.anthropic = Anthropic()
+        # resolved once so both clients below (and the HTTP/2 choice) agree on it
+        host = _parse_host(os.getenv("OLLAMA_HOST"))
+        # one connection pool shared by every Ollama request; httpx only
+        # negotiates HTTP/2 over TLS, so it's only useful for https hosts
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=host.startswith("https://"),
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+        # the ollama client forwards transport to the httpx client it creates
+        self.aclient = ollama.AsyncClient(host=host, transport=self.transport)
+        # for the raw tool-selection request
+        self.http = httpx.AsyncClient(
+            base_url=host,
+            transport=self.transport,
+            timeout=None,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
         self.model = "llama3.2:3b-instruct-fp16"
+        # smaller quantized model for summarizing tool results
+        self.summary_model = "llama3.2:1b-instruct-q4_K_M"
+        # semantic cache of (normalized query embedding, query locations, response,
+        # expiry time), least recently used first
+        self.embedder = SentenceTransformer('all-MiniLM-L6-v2') if SentenceTransformer else None
+        self.cache: list[tuple["np.ndarray", frozenset[str], str, float]] = []
+        # exact-match cache of tool results keyed by (tool name, canonical args)
+        self.tool_cache = cachetools.TTLCache(maxsize=256, ttl=TOOL_CACHE_TTL)
         
 
     async def connect_to_server(self, server_script_path: str):
@@ -66,9 +309,32 @@ class MCPClient:
         await self.session.initialize()
         
         # List available tools
+        tools = await self.refresh_tools()
+        console.print("\nConnected to server with tools:", [tool.name for tool in tools])
+
+        # Preload the models so the first query doesn't pay the cold start.
+        # Ollama reloads a model when num_ctx changes, so each warm-up uses
+        # the context size its model is later called with.
+        warmups = [
+            (self.model, {"num_predict": 1, "num_ctx": TOOL_SELECT_OPTS["num_ctx"]}),
+            (self.summary_model, {"num_predict": 1, "num_ctx": SUMMARY_NUM_CTX}),
+        ]
+        await asyncio.gather(*[
+            self.aclient.chat(
+                model=model,
+                messages=[{"role": "user", "content": "ok"}],
+                keep_alive=KEEP_ALIVE,
+                options=options,
+            )
+            for model, options in warmups
+        ])
+
+    async def refresh_tools(self):
+        """Fetch the server's tools and cache them in OpenAI format"""
         response = await self.session.list_tools()
-        tools = response.tools
-        print("\nConnected to server with tools:", [tool.name for tool in tools])
+        # serialized once so the tool-selection request doesn't re-encode the schema
+        self._tools_json = orjson.dumps(self.convert_to_openai_format(response.tools)) if response.tools else b""
+        return response.tools
 
     def convert_to_openai_format(self, tools):
         """Convert tools to OpenAI format"""
@@ -82,25 +348,79 @@ class MCPClient:
         } for tool in tools]
 
 
-    async def process_query(self, query: str) -> str:
+    async def process_query(self, query: str, live: bool = True) -> QueryResult:
+        """Process a query, answering paraphrases of earlier queries from the semantic cache
+
+        Args:
+            query: The user's query
+            live: Render the summary as it streams in when there is a single tool call
+        """
+        if self.embedder is None:
+            return await self._process_query(query, live)
+
+        q_emb = await asyncio.to_thread(self.embedder.encode, query, normalize_embeddings=True)
+        locations = query_locations(query)
+        cached = self._cache_lookup(q_emb, locations)
+        if cached is not None:
+            return QueryResult(cached)
+
+        result = await self._process_query(query, live)
+        if result.cacheable:
+            self.cache.append((q_emb, locations, result.text, time.monotonic() + SEMANTIC_CACHE_TTL))
+            if len(self.cache) > SEMANTIC_CACHE_SIZE:
+                self.cache.pop(0)
+        return result
+
+    def _cache_lookup(self, q_emb, locations: frozenset[str]) -> Optional[str]:
+        """Return the cached response for the same locations most similar to q_emb, if similar enough"""
+        now = time.monotonic()
+        self.cache = [entry for entry in self.cache if entry[3] > now]
+        candidates = [i for i, entry in enumerate(self.cache) if entry[1] == locations]
+        if not candidates:
+            return None
+        # embeddings are normalized so the dot product is the cosine similarity
+        sims = np.stack([self.cache[i][0] for i in candidates]) @ q_emb
+        best = int(np.argmax(sims))
+        if sims[best] <= SEMANTIC_CACHE_THRESHOLD:
+            return None
+        # move the hit to the end so the least recently used entry is evicted first
+        entry = self.cache.pop(candidates[best])
+        self.cache.append(entry)
+        return entry[2]
+
+    async def process_batch(self, queries: list[str]) -> list[str]:
+        """Process several queries concurrently
+
+        The tool-selection requests for all queries are in flight at once so
+        Ollama can batch them, and their tool calls are dispatched concurrently.
+        A query that fails gets its error as its response instead of failing
+        the whole batch.
+        """
+        tasks = [self.process_query(query, live=False) for query in queries]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [
+            # BaseException so a cancelled query (CancelledError) is reported too
+            f"Error: {str(result) or type(result).__name__}" if isinstance(result, BaseException) else result.text
+            for result in results
+        ]
+
+    async def _process_query(self, query: str, live: bool = True) -> QueryResult:
         """Process a query using Claude and available tools"""
 
         messages = [
+            SYSTEM_MESSAGE,
             {
                 "role": "user",
                 "content": query
             }
         ]
 
-        response = await self.session.list_tools()
         # available_tools = [{ 
         #     "name": tool.name,
         #     "description": tool.description,
         #     "input_schema": tool.inputSchema
         # } for tool in response.tools]
 
-        available_tools = self.convert_to_openai_format(response.tools)
-        
         # Initial Claude API call
         # response = self.anthropic.messages.create(
         #     model="claude-3-5-sonnet-20241022",
@@ -109,23 +429,17 @@ class MCPClient:
         #     tools=available_tools
         # )
         # Switching to ollama
-        response = ollama.chat(
-            model=self.model, # model supporting chat functionality
-            messages=messages,
-            tools=available_tools or [],
-            stream=False,
-        )
+        response = await self._select_tools(messages)
 
         # Process response and handle tool calls
-        tool_results = []
-        final_text = []
-        logging.debug("step 1: " + str(response))
+        # arguments are only formatted if DEBUG is enabled
+        logger.debug("step 1: %s", response)
         message = response.message
         tool_calls = []
         if hasattr(message, "tool_calls") and message.tool_calls:
             for tool in message.tool_calls:
                 tool_calls.append({
-                    "id": str(uuid.uuid4()),
+                    "id": f"call_{next(self._tool_id)}",
                     "type": "function",
                     "function": {
                         "name": tool.function.name,
@@ -134,60 +448,18 @@ class MCPClient:
                 })
 
         if tool_calls:
-            for tool_call in tool_calls:
-                if hasattr(tool_call, "function"):
-                    tool_name = getattr(tool_call.function, "name", "no tool found")
-                    tool_args = getattr(tool_call.function, "arguments", {})
-                elif isinstance(tool_call, dict) and "function" in tool_call:
-                    fn_info = tool_call["function"]
-                    tool_name = fn_info.get("name", "no tool found")
-                    tool_args = fn_info.get("arguments", {})
-                else:
-                    tool_name = "no tool found"
-                    tool_args = {}
-
-                tool_args_str = json.dumps(tool_args, indent=2)
-                tool_md = f"**Tool Call:** {tool_name}\n\n```json\n{tool_args_str}\n```"
-                print(Panel(Markdown(tool_md), style="bold magenta", title="Tool Invocation"))
-
-                result = await self.session.call_tool(tool_name, tool_args)
-                tool_results.append({"call": tool_name, "result": result})
-                # final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
-
-                data = result.model_dump()
-                logging.debug(data)
-                if data.get("isError"):
-                    return f"function call for {tool_name} failed with arguments {tool_args}"
-                else:
-                    # updating messages (conversation history) with system calls
-                    messages.append( {
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [tool_call]
-                    })
-                    
-                    for content in data.get("content", []):
-                        if isinstance(content, dict) and content.get("type") == "text":
-                            print(Panel(Markdown(content.get("text")), style="bold green", title="Raw response"))
-                            messages.append({
-                                "role": "tool",
-                                "content": content.get("text")
-                            })
-                            logging.debug(json.dumps(messages, indent=2))
-                            response = ollama.chat(
-                                model=self.model, # model supporting chat functionality
-                                messages=messages,
-                                stream=True,
-                                options={"num_ctx": 1024}
-                            )
-                            for chunk in response:
-                                # print(chunk['message']['content'], end='', flush=True)
-                                final_text.append(chunk.message.content)
-                            
-                            
-                    return "".join(final_text)
-                # tool_results.append({"call": tool_name, "result": result})
-                # final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
+            # dispatch every tool call (and its summary) concurrently
+            # rich supports a single live display, so only stream a lone summary
+            live = live and len(tool_calls) == 1
+            tasks = [self._run_one(tool_call, live) for tool_call in tool_calls]
+            results = await asyncio.gather(*tasks)
+            return QueryResult(
+                text="\n\n".join(result.text for result in results),
+                tool_calls=[call for result in results for call in result.tool_calls],
+                streamed=any(result.streamed for result in results),
+                cacheable=all(result.cacheable for result in results),
+            )
+        return QueryResult(message.content or "")
 
         # for content in response.content:
         #     if content.type == 'text':
@@ -224,46 +496,202 @@ class MCPClient:
         # return "\n".join(final_text)
 
 
+    async def _select_tools(self, messages: list) -> ollama.ChatResponse:
+        """Ask the model which tools to call, sending the pre-serialized tool schema"""
+        if not self._tools_json:
+            return await self.aclient.chat(
+                model=self.model, # model supporting chat functionality
+                messages=messages,
+                stream=False,
+                keep_alive=KEEP_ALIVE,
+                options=TOOL_SELECT_OPTS,
+            )
+
+        body = (
+            b'{"model":' + orjson.dumps(self.model)
+            + b',"messages":' + orjson.dumps(messages)
+            + b',"tools":' + self._tools_json
+            + b',"stream":false,"keep_alive":' + orjson.dumps(KEEP_ALIVE)
+            + b',"options":' + orjson.dumps(TOOL_SELECT_OPTS)
+            + b'}'
+        )
+        response = await self.http.post("/api/chat", content=body)
+        # surface failures the same way ollama.AsyncClient does
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise ollama.ResponseError(e.response.text, e.response.status_code) from None
+        data = orjson.loads(response.content)
+        if err := data.get("error"):
+            raise ollama.ResponseError(err)
+        return ollama.ChatResponse.model_validate(data)
+
+    async def _run_one(self, tool_call, live: bool = False) -> QueryResult:
+        """Call a single tool and summarize its result
+
+        Args:
+            tool_call: Tool call requested by the model
+            live: Render the summary as it streams in
+        """
+        if hasattr(tool_call, "function"):
+            tool_name = getattr(tool_call.function, "name", "no tool found")
+            tool_args = getattr(tool_call.function, "arguments", {})
+        elif isinstance(tool_call, dict) and "function" in tool_call:
+            fn_info = tool_call["function"]
+            tool_name = fn_info.get("name", "no tool found")
+            tool_args = fn_info.get("arguments", {})
+        else:
+            tool_name = "no tool found"
+            tool_args = {}
+        tool_args = normalize_tool_args(tool_name, tool_args)
+        tool_calls = [(tool_name, tool_args)]
+
+        tool_args_str = orjson.dumps(tool_args, option=orjson.OPT_INDENT_2).decode()
+        tool_md = f"**Tool Call:** {tool_name}\n\n```json\n{tool_args_str}\n```"
+        await asyncio.to_thread(print_markdown, tool_md, style="bold magenta", title="Tool Invocation")
+
+        result = await self._call_tool(tool_name, tool_args)
+
+        data = result.model_dump()
+        logger.debug("%s", data)
+        if data.get("isError"):
+            return QueryResult(f"function call for {tool_name} failed with arguments {tool_args}", tool_calls)
+
+        texts = [c["text"] for c in data.get("content", []) if isinstance(c, dict) and c.get("type") == "text"]
+        if not texts:
+            return QueryResult("", tool_calls)
+        tool_output = "\n\n".join(texts)
+        await asyncio.to_thread(print_markdown, tool_output, style="bold green", title="Raw response")
+
+        # only the tool output is summarized, not the whole conversation
+        messages_summary = [SUMMARY_SYS, {"role": "user", "content": tool_output}]
+        # rough estimate of ~4 characters per token
+        approx_tokens = sum(len(m["content"]) for m in messages_summary) // 4
+        logger.debug("summary prompt is ~%d tokens", approx_tokens)
+        if approx_tokens > SUMMARY_NUM_CTX:
+            logger.warning("summary prompt (~%d tokens) exceeds num_ctx %d and will be truncated", approx_tokens, SUMMARY_NUM_CTX)
+        response = await self.aclient.chat(
+            model=self.summary_model,
+            messages=messages_summary,
+            stream=True,
+            keep_alive=KEEP_ALIVE,
+            options={"num_ctx": SUMMARY_NUM_CTX}
+        )
+        buf = ""
+        if live:
+            with Live(Markdown(buf), console=console, refresh_per_second=15) as display:
+                async for chunk in response:
+                    buf += chunk.message.content
+                    display.update(Markdown(buf))
+        else:
+            async for chunk in response:
+                buf += chunk.message.content
+        return QueryResult(buf, tool_calls, streamed=live, cacheable=bool(buf))
+
+    async def _call_tool(self, tool_name: str, tool_args: dict) -> CallToolResult:
+        """Call a tool on the server, reusing recent results for identical arguments"""
+        key = (tool_name, orjson.dumps(tool_args, option=orjson.OPT_SORT_KEYS))
+        cached = self.tool_cache.get(key)
+        if cached is not None:
+            return CallToolResult.model_validate(cached)
+
+        result = await self.session.call_tool(tool_name, tool_args)
+        if not result.isError:
+            self.tool_cache[key] = result.model_dump()
+        return result
+
+    async def _prefetch(self, tool_calls: list[tuple[str, dict]]):
+        """Warm the tool cache with likely follow-ups to the given tool calls"""
+        follow_ups = []
+        for tool_name, tool_args in tool_calls:
+            if tool_name == "get-alerts" and isinstance(tool_args.get("state"), str):
+                # tool_calls come from _run_one, so the state is already normalized
+                follow_ups += [
+                    ("get-alerts", {"state": neighbor})
+                    for neighbor in STATE_NEIGHBORS.get(tool_args["state"], ())[:PREFETCH_NEIGHBORS]
+                ]
+
+        results = await asyncio.gather(
+            *[self._call_tool(tool_name, tool_args) for tool_name, tool_args in follow_ups],
+            return_exceptions=True,
+        )
+        for (tool_name, tool_args), result in zip(follow_ups, results):
+            if isinstance(result, Exception):
+                logger.debug("prefetch of %s %s failed: %s", tool_name, tool_args, result)
+
+    async def _cancel_prefetch(self):
+        """Cancel a prefetch that is still running and wait for it to stop"""
+        task, self._prefetch_task = self._prefetch_task, None
+        if task is None:
+            return
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
     async def chat_loop(self):
         """Run an interactive chat loop"""
-        print("\nMCP Client Started!")
-        print("Type your queries or 'quit' to exit.")
+        console.print("\nMCP Client Started!")
+        console.print("Type your queries or 'quit' to exit.")
         
         while True:
             try:
                 # query = input("\nQuery: ").strip()
-                query = Prompt.ask("[bold yellow]Query> [/bold yellow]")
+                # read without blocking the event loop
+                console.print("[bold yellow]Query> [/bold yellow]", end="")
+                query = (await ainput()).strip()
+                await self._cancel_prefetch()
 
                 if query.lower() == 'quit':
-                    print(Panel("Exiting chate mode.", style="bold red"))
+                    console.print(EXIT_PANEL)
                     break
                     
                 query_text = query if query else "[No Message]"
-                print(Panel(query_text, style="bold yellow", title="You"))
+                console.print(Panel(query_text, style="bold yellow", title="You"))
 
-                response = await self.process_query(query)
-                logging.debug(response)
-                print(Panel(Markdown(response), style="bold blue", title="Assistant Summary"))
+                result = await self.process_query(query)
+                logger.debug("%s", result.text)
+                if result.tool_calls:
+                    # use the time the user spends reading to warm the tool cache
+                    self._prefetch_task = asyncio.create_task(self._prefetch(result.tool_calls))
+                if not result.streamed:
+                    await asyncio.to_thread(print_markdown, result.text, style="bold blue", title="Assistant Summary")
                     
             except Exception as e:
-                print(f"\nError: {str(e)}")
+                console.print(f"\nError: {str(e)}")
     
     async def cleanup(self):
         """Clean up resources"""
+        # stop any in-flight call_tool before the stdio session shuts down
+        await self._cancel_prefetch()
         await self.exit_stack.aclose()
+        # closes the pool shared by ollama.AsyncClient and self.http
+        await self.transport.aclose()
 
 async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python client.py <path_to_server_script>")
-        sys.exit(1)
-        
+    parser = argparse.ArgumentParser(description="Chat with an MCP server through Ollama")
+    parser.add_argument("server_script", help="path to the server script (.py or .js)")
+    parser.add_argument("--batch-file", help="answer the queries in this file, one per line, instead of chatting")
+    args = parser.parse_args()
+
     client = MCPClient()
     try:
-        await client.connect_to_server(sys.argv[1])
-        await client.chat_loop()
+        await client.connect_to_server(args.server_script)
+        if args.batch_file:
+            with open(args.batch_file) as f:
+                queries = [line.strip() for line in f if line.strip()]
+            responses = await client.process_batch(queries)
+            for query, response in zip(queries, responses):
+                console.print(Panel(query, style="bold yellow", title="You"))
+                await asyncio.to_thread(print_markdown, response or "", style="bold blue", title="Assistant Summary")
+        else:
+            await client.chat_loop()
     finally:
         await client.cleanup()
 
 if __name__ == "__main__":
-    import sys
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:  # uvloop isn't available on Windows
+        asyncio.run(main())
+    else:
+        uvloop.run(main())